@@ -6,40 +6,22 @@ from pyevtk.hl import gridToVTK
 
 def readPlot3D(filename):
     """Read Plot3D format FFD file"""
-    with open(filename, 'r') as f:
+    with open(filename, 'rb') as f:
         # Read number of blocks
         nBlocks = int(f.readline().strip())
         
         # Read dimensions
         dims = f.readline().strip().split()
         nx, ny, nz = int(dims[0]), int(dims[1]), int(dims[2])
+        n = nx*ny*nz
         
-        # Read X coordinates
-        x = []
-        for line in f:
-            if line.strip():
-                x.extend([float(v) for v in line.strip().split()])
-                if len(x) >= nx*ny*nz:
-                    break
-        x = np.array(x[:nx*ny*nz]).reshape((nz, ny, nx))
+        # Stream the X, Y and Z blocks straight from the file into one array
+        # Single precision is plenty for visualisation and halves the .vts size
+        values = np.fromfile(f, dtype=np.float32, count=3*n, sep=' ')
         
-        # Read Y coordinates
-        y = []
-        for line in f:
-            if line.strip():
-                y.extend([float(v) for v in line.strip().split()])
-                if len(y) >= nx*ny*nz:
-                    break
-        y = np.array(y[:nx*ny*nz]).reshape((nz, ny, nx))
-        
-        # Read Z coordinates
-        z = []
-        for line in f:
-            if line.strip():
-                z.extend([float(v) for v in line.strip().split()])
-                if len(z) >= nx*ny*nz:
-                    break
-        z = np.array(z[:nx*ny*nz]).reshape((nz, ny, nx))
+    x = values[0:n].reshape((nz, ny, nx))
+    y = values[n:2*n].reshape((nz, ny, nx))
+    z = values[2*n:3*n].reshape((nz, ny, nx))
         
     return x, y, z
 
@@ -10,6 +10,9 @@ Configuration:
     Modify the INPUT_DIR, OUTPUT_DIR, and FILE_PATTERN variables below.
 """
 
+import base64
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import io
 import numpy as np
 import os
 from pathlib import Path
@@ -24,14 +27,16 @@ OUTPUT_DIR = './vtk_output'  # Directory for output files
 FILE_PATTERN = 'boxcpsBsplines*.csv'  # Pattern to match CSV files
 OUTPUT_NAME = 'control_points'  # Base name for output files
 CREATE_ZIP = True  # Set to True to create a zip archive with all files
+COMPRESS_ZIP = False  # Set to True to deflate the zip archive (slower, binary VTP data shrinks little)
+MAX_WORKERS = None  # Number of worker processes (None uses all CPU cores)
 
 # ============================================================================
 
 
 def read_control_points(csv_file):
     """Read control points from CSV file."""
-    # Read CSV, skipping the header
-    data = np.genfromtxt(csv_file, delimiter=',', skip_header=1)
+    # Read CSV, skipping the header (np.loadtxt parses in C, unlike np.genfromtxt)
+    data = np.loadtxt(csv_file, delimiter=',', skiprows=1, ndmin=2)
     
     # Extract coordinates
     points = data[:, 0:3]  # x, y, z
@@ -41,11 +46,43 @@ def read_control_points(csv_file):
     return points, indices, active
 
 
-def write_vtp_polydata(filename, points, indices, active, timestep):
-    """Write control points to XML VTK PolyData format (.vtp)."""
+def encode_data_array(values, dtype):
+    """Encode an array as base64 binary data for a VTK XML DataArray."""
+    data = np.ascontiguousarray(values, dtype=dtype).tobytes()
+    # Uncompressed binary arrays are prefixed by their byte count (header_type="UInt64")
+    header = np.array([len(data)], dtype='<u8').tobytes()
+    return base64.b64encode(header + data).decode('ascii')
+
+
+# Encoded arrays that stay the same between timesteps (the control point topology is fixed)
+_topology_cache = {}
+_index_cache = {'indices': None, 'encoded': None}
+
+
+def encode_topology(n_points):
+    """Encode the point ids (also the vertex connectivity) and vertex offsets, cached per point count."""
+    if n_points not in _topology_cache:
+        point_ids = np.arange(n_points)
+        _topology_cache[n_points] = (encode_data_array(point_ids, '<i4'),
+                                     encode_data_array(point_ids + 1, '<i4'))
+    return _topology_cache[n_points]
+
+
+def encode_indices(indices):
+    """Encode the i, j, k index arrays, reusing the previous encoding if the indices are unchanged."""
+    cached = _index_cache['indices']
+    if cached is None or not np.array_equal(cached, indices):
+        _index_cache['indices'] = indices.copy()
+        _index_cache['encoded'] = [encode_data_array(indices[:, idim], '<i4') for idim in range(3)]
+    return _index_cache['encoded']
+
+
+def build_vtp_polydata(points, indices, active):
+    """Build the XML VTK PolyData (.vtp) document for the control points as bytes."""
     n_points = len(points)
+    point_ids_data, offsets_data = encode_topology(n_points)
     
-    with open(filename, 'w') as f:
+    with io.StringIO() as f:
         # XML VTP Header
         f.write('<?xml version="1.0"?>\n')
         f.write('<VTKFile type="PolyData" version="1.0" byte_order="LittleEndian" header_type="UInt64">\n')
@@ -54,61 +91,38 @@ def write_vtp_polydata(filename, points, indices, active, timestep):
         
         # Points
         f.write('      <Points>\n')
-        f.write('        <DataArray type="Float32" Name="Points" NumberOfComponents="3" format="ascii">\n')
-        for point in points:
-            f.write(f'          {point[0]:.6f} {point[1]:.6f} {point[2]:.6f}\n')
+        f.write('        <DataArray type="Float32" Name="Points" NumberOfComponents="3" format="binary">\n')
+        f.write(f'          {encode_data_array(points, "<f4")}\n')
         f.write('        </DataArray>\n')
         f.write('      </Points>\n')
         
         # Vertices (connectivity)
         f.write('      <Verts>\n')
-        f.write('        <DataArray type="Int32" Name="connectivity" format="ascii">\n')
-        f.write('          ')
-        for i in range(n_points):
-            f.write(f'{i} ')
-        f.write('\n        </DataArray>\n')
-        f.write('        <DataArray type="Int32" Name="offsets" format="ascii">\n')
-        f.write('          ')
-        for i in range(1, n_points + 1):
-            f.write(f'{i} ')
-        f.write('\n        </DataArray>\n')
+        f.write('        <DataArray type="Int32" Name="connectivity" format="binary">\n')
+        f.write(f'          {point_ids_data}\n')
+        f.write('        </DataArray>\n')
+        f.write('        <DataArray type="Int32" Name="offsets" format="binary">\n')
+        f.write(f'          {offsets_data}\n')
+        f.write('        </DataArray>\n')
         f.write('      </Verts>\n')
         
         # Point Data
         f.write('      <PointData>\n')
         
-        # i_index
-        f.write('        <DataArray type="Int32" Name="i_index" format="ascii">\n')
-        f.write('          ')
-        for idx in indices:
-            f.write(f'{idx[0]} ')
-        f.write('\n        </DataArray>\n')
-        
-        # j_index
-        f.write('        <DataArray type="Int32" Name="j_index" format="ascii">\n')
-        f.write('          ')
-        for idx in indices:
-            f.write(f'{idx[1]} ')
-        f.write('\n        </DataArray>\n')
-        
-        # k_index
-        f.write('        <DataArray type="Int32" Name="k_index" format="ascii">\n')
-        f.write('          ')
-        for idx in indices:
-            f.write(f'{idx[2]} ')
-        f.write('\n        </DataArray>\n')
+        # i_index, j_index, k_index
+        for name, index_data in zip(('i_index', 'j_index', 'k_index'), encode_indices(indices)):
+            f.write(f'        <DataArray type="Int32" Name="{name}" format="binary">\n')
+            f.write(f'          {index_data}\n')
+            f.write('        </DataArray>\n')
         
         # point_id
-        f.write('        <DataArray type="Int32" Name="point_id" format="ascii">\n')
-        f.write('          ')
-        for i in range(n_points):
-            f.write(f'{i} ')
-        f.write('\n        </DataArray>\n')
+        f.write('        <DataArray type="Int32" Name="point_id" format="binary">\n')
+        f.write(f'          {point_ids_data}\n')
+        f.write('        </DataArray>\n')
         
         # Active flags as vector
-        f.write('        <DataArray type="Float32" Name="active" NumberOfComponents="3" format="ascii">\n')
-        for act in active:
-            f.write(f'          {act[0]:.1f} {act[1]:.1f} {act[2]:.1f}\n')
+        f.write('        <DataArray type="Float32" Name="active" NumberOfComponents="3" format="binary">\n')
+        f.write(f'          {encode_data_array(active, "<f4")}\n')
         f.write('        </DataArray>\n')
         
         f.write('      </PointData>\n')
@@ -116,6 +130,19 @@ def write_vtp_polydata(filename, points, indices, active, timestep):
         f.write('    </Piece>\n')
         f.write('  </PolyData>\n')
         f.write('</VTKFile>\n')
+        
+        return f.getvalue().encode('ascii')
+
+
+def write_payload(filename, payload):
+    """Write a prebuilt file payload with a single write call."""
+    with open(filename, 'wb') as f:
+        f.write(payload)
+
+
+def write_vtp_polydata(filename, points, indices, active, timestep):
+    """Write control points to XML VTK PolyData format (.vtp)."""
+    write_payload(filename, build_vtp_polydata(points, indices, active))
 
 
 def write_pvd_file(pvd_filename, vtp_files, timesteps):
@@ -138,7 +165,13 @@ def create_zip_archive(output_dir, output_name, pvd_file, vtp_files):
     """Create a zip archive containing all VTK files."""
     zip_filename = os.path.join(output_dir, f'{output_name}_temporal.zip')
     
-    with zipfile.ZipFile(zip_filename, 'w', zipfile.ZIP_DEFLATED) as zipf:
+    # The base64 binary VTP data compresses poorly, so store the files by default
+    if COMPRESS_ZIP:
+        compression, compresslevel = zipfile.ZIP_DEFLATED, 1
+    else:
+        compression, compresslevel = zipfile.ZIP_STORED, None
+    
+    with zipfile.ZipFile(zip_filename, 'w', compression, compresslevel=compresslevel) as zipf:
         # Add PVD file
         zipf.write(pvd_file, os.path.basename(pvd_file))
         
@@ -149,6 +182,13 @@ def create_zip_archive(output_dir, output_name, pvd_file, vtp_files):
     return zip_filename
 
 
+def build_vtp_from_csv(csv_file):
+    """Read one CSV file and build its VTP document, returns the payload and point count."""
+    points, indices, active = read_control_points(csv_file)
+    
+    return build_vtp_polydata(points, indices, active), len(points)
+
+
 def main():
     print("="*70)
     print("CSV to VTK Temporal Converter for ParaView")
@@ -169,12 +209,8 @@ def main():
     for f in csv_files:
         print(f"  {f.name}")
     
-    # Process each CSV file
-    vtp_files = []
-    timesteps = []
-    
-    print("\nProcessing files...")
-    print("-"*70)
+    # Collect the CSV files to process together with their timestep
+    jobs = []
     
     for csv_file in csv_files:
         # Extract timestep number from filename
@@ -187,17 +223,35 @@ def main():
             print(f"Warning: Could not extract timestep from {csv_file.name}, skipping")
             continue
         
-        # Read control points
-        points, indices, active = read_control_points(csv_file)
-        
-        # Write VTP file (XML VTK PolyData)
-        vtp_filename = os.path.join(OUTPUT_DIR, f'{OUTPUT_NAME}_t{timestep:04d}.vtp')
-        write_vtp_polydata(vtp_filename, points, indices, active, timestep)
+        jobs.append((timestep, csv_file))
+    
+    # Order by timestep rather than by filename (boxcpsBsplines10 < boxcpsBsplines2)
+    jobs.sort()
+    timesteps = [timestep for timestep, _ in jobs]
+    csv_inputs = [csv_file for _, csv_file in jobs]
+    
+    # Process each CSV file: timesteps are independent, so worker processes read the
+    # CSV and build the VTP document while threads write finished documents to disk
+    vtp_files = []
+    writes = []
+    
+    print("\nProcessing files...")
+    print("-"*70)
+    
+    with ProcessPoolExecutor(max_workers=MAX_WORKERS) as executor, ThreadPoolExecutor() as writer:
+        results = executor.map(build_vtp_from_csv, csv_inputs)
         
-        print(f"Timestep {timestep:3d}: {len(points):4d} points -> {os.path.basename(vtp_filename)}")
+        for timestep, (payload, n_points) in zip(timesteps, results):
+            # Write VTP file (XML VTK PolyData)
+            vtp_filename = os.path.join(OUTPUT_DIR, f'{OUTPUT_NAME}_t{timestep:04d}.vtp')
+            writes.append(writer.submit(write_payload, vtp_filename, payload))
+            
+            print(f"Timestep {timestep:3d}: {n_points:4d} points -> {os.path.basename(vtp_filename)}")
+            vtp_files.append(vtp_filename)
         
-        vtp_files.append(vtp_filename)
-        timesteps.append(timestep)
+        # Make sure every VTP file is on disk (and re-raise write errors) before the PVD
+        for write in writes:
+            write.result()
     
     # Write PVD collection file
     pvd_filename = os.path.join(OUTPUT_DIR, f'{OUTPUT_NAME}_temporal.pvd')
@@ -5,26 +5,18 @@ def writeFFDFile(fileName,nBlocks,nx,ny,nz,points):
     '''
     Take in a set of points and write the plot 3dFile
     '''
-    f = open(fileName,'w')
+    f = open(fileName,'w',buffering=1<<20)
     f.write('%d\n'%nBlocks)
     for i in range(nBlocks):
         f.write('%d %d %d '%(nx[i],ny[i],nz[i]))
     f.write('\n')
     for block in range(nBlocks):
-        for k in range(nz[block]):
-            for j in range(ny[block]):
-                for i in range(nx[block]):
-                    f.write('%f '%points[block][i,j,k,0])
-        f.write('\n')
-        for k in range(nz[block]):
-            for j in range(ny[block]):
-                for i in range(nx[block]):
-                    f.write('%f '%points[block][i,j,k,1])
-        f.write('\n')
-        for k in range(nz[block]):
-            for j in range(ny[block]):
-                for i in range(nx[block]):
-                    f.write('%f '%points[block][i,j,k,2])
+        # Reorder to (3,nz,ny,nx) in one pass: Plot3D has i varying fastest, then j, then k
+        coords = np.ascontiguousarray(points[block].transpose(3,2,1,0)).reshape(3,-1)
+        for idim in range(3):
+            f.write(''.join(np.char.mod('%f ', coords[idim])))
+            if idim < 2:
+                f.write('\n')
     f.close()
     return
 
@@ -41,25 +33,27 @@ def returnBlockPoints(corners,nx,ny,nz):
     6: xMax, yMax, zMax
     7: xMin, yMax, zMax
     '''
+    corners = np.asarray(corners)
+
+    # Parametric coordinates along X, Y and Z, shaped to broadcast to (nx,ny,nz)
+    u = np.linspace(0.0, 1.0, nx)[:,None,None]
+    v = np.linspace(0.0, 1.0, ny)[None,:,None]
+    w = np.linspace(0.0, 1.0, nz)[None,None,:]
+
+    # Trilinear weights, one per corner in the ordering above
+    weights = [(1-u)*(1-v)*(1-w),  # 0
+               u*(1-v)*(1-w),      # 1
+               u*(1-v)*w,          # 2
+               (1-u)*(1-v)*w,      # 3
+               (1-u)*v*(1-w),      # 4
+               u*v*(1-w),          # 5
+               u*v*w,              # 6
+               (1-u)*v*w]          # 7
+
     points = np.zeros([nx,ny,nz,3])
-    
-    for idim in range(3):
-        # Create edges in Z direction (at the 4 corners of bottom/top faces)
-        edge_yMin_xMin = np.linspace(corners[0][idim], corners[3][idim], nz)  # Bottom-left edge
-        edge_yMin_xMax = np.linspace(corners[1][idim], corners[2][idim], nz)  # Bottom-right edge
-        edge_yMax_xMin = np.linspace(corners[4][idim], corners[7][idim], nz)  # Top-left edge
-        edge_yMax_xMax = np.linspace(corners[5][idim], corners[6][idim], nz)  # Top-right edge
-        
-        for k in range(nz):
-            # For this Z position, interpolate in X direction at yMin and yMax
-            edge_yMin = np.linspace(edge_yMin_xMin[k], edge_yMin_xMax[k], nx)
-            edge_yMax = np.linspace(edge_yMax_xMin[k], edge_yMax_xMax[k], nx)
-            
-            for i in range(nx):
-                # For this X,Z position, interpolate in Y direction
-                edge_y = np.linspace(edge_yMin[i], edge_yMax[i], ny)
-                points[i,:,k,idim] = edge_y
-    
+    for icorner in range(8):
+        points += weights[icorner][...,None]*corners[icorner]
+
     return points
 
 ################ FFD ##############
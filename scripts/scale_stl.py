@@ -3,7 +3,7 @@
 Scale STL file by factor of 0.001
 """
 import numpy as np
-from stl import mesh
+from stl import mesh, Mode
 
 # Input/Output files
 input_file = "fastback_optSurface.stl"
@@ -31,5 +31,5 @@ print(f"  Z: [{your_mesh.z.min():.6f}, {your_mesh.z.max():.6f}]")
 
 # Save scaled STL
 print(f"\nSaving to {output_file}...")
-your_mesh.save(output_file)
+your_mesh.save(output_file, mode=Mode.BINARY)  # binary STL, ~5x smaller than ASCII
 print("Done!")
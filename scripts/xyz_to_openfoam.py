@@ -4,12 +4,40 @@ Script to convert XYZ format FFD control points to OpenFOAM dictionary format.
 Supports Plot3D-style XYZ format with separate x, y, z coordinate arrays.
 """
 
+from concurrent.futures import ThreadPoolExecutor
+import io
+import mmap
 import numpy as np
 import sys
 from pathlib import Path
 
+# One entry of the controlPoints list, formatted with a single %-format call per point
+POINT_FORMAT = "( %.8g %.8g %.8g )"
 
-def parse_xyz_file(filename):
+
+def _parse_line(line, dtype, n, what):
+    """Parse one whitespace separated line of numbers in C, checking it holds n values."""
+    values = np.fromstring(line, sep=' ', dtype=dtype)
+    if values.size != n:
+        raise ValueError(f"Expected {n} {what}, got {values.size}")
+    return values
+
+
+def _coordinate_storage(n_points, out=None):
+    """
+    Return (3, n_points) storage for the x, y and z coordinate rows.
+    
+    If `out` is given it must have shape (n_points, 3) and its transpose is returned,
+    so filling the rows fills `out` in place.
+    """
+    if out is None:
+        return np.empty((3, n_points))
+    if out.shape != (n_points, 3):
+        raise ValueError(f"Expected out array of shape {(n_points, 3)}, got {out.shape}")
+    return out.T
+
+
+def parse_xyz_file(filename, out=None, cache=False, verbose=False):
     """
     Parse XYZ format FFD file.
     
@@ -22,51 +50,73 @@ def parse_xyz_file(filename):
     
     Args:
         filename: Path to the XYZ file
+        out: optional preallocated float array of shape (n_points, 3) to parse
+            into, e.g. to reuse one buffer when converting many files in a loop
+        cache: if True, keep the parsed coordinates in a binary <filename>.npz
+            sidecar and load them from there while it is newer than the XYZ file
+        verbose: if True, print the file header, grid size and coordinate ranges
         
     Returns:
         tuple: (points_array, dimensions)
-            - points_array: numpy array of shape (n_points, 3)
+            - points_array: numpy array of shape (n_points, 3), `out` if given
             - dimensions: tuple (nx, ny, nz)
     """
-    with open(filename, 'r') as f:
-        lines = f.readlines()
-    
-    # Parse version/type (line 1)
-    version = int(lines[0].strip())
-    print(f"File version/type: {version}")
-    
-    # Parse dimensions (line 2)
-    dims = [int(x) for x in lines[1].strip().split()]
-    if len(dims) != 3:
-        raise ValueError(f"Expected 3 dimensions, got {len(dims)}")
-    
-    nx, ny, nz = dims
-    n_points = nx * ny * nz
-    print(f"Grid dimensions: {nx} x {ny} x {nz} = {n_points} points")
-    
-    # Parse coordinates (lines 3, 4, 5)
-    x_coords = [float(x) for x in lines[2].strip().split()]
-    y_coords = [float(x) for x in lines[3].strip().split()]
-    z_coords = [float(x) for x in lines[4].strip().split()]
-    
-    # Verify we have the correct number of coordinates
-    if len(x_coords) != n_points:
-        raise ValueError(f"Expected {n_points} x-coordinates, got {len(x_coords)}")
-    if len(y_coords) != n_points:
-        raise ValueError(f"Expected {n_points} y-coordinates, got {len(y_coords)}")
-    if len(z_coords) != n_points:
-        raise ValueError(f"Expected {n_points} z-coordinates, got {len(z_coords)}")
-    
-    # Combine into points array
-    points = np.zeros((n_points, 3))
-    points[:, 0] = x_coords
-    points[:, 1] = y_coords
-    points[:, 2] = z_coords
-    
-    print(f"Successfully parsed {n_points} control points")
-    print(f"X range: [{np.min(x_coords):.6f}, {np.max(x_coords):.6f}]")
-    print(f"Y range: [{np.min(y_coords):.6f}, {np.max(y_coords):.6f}]")
-    print(f"Z range: [{np.min(z_coords):.6f}, {np.max(z_coords):.6f}]")
+    cache_file = Path(f"{filename}.npz")
+    use_cached = (cache and cache_file.exists()
+                  and cache_file.stat().st_mtime >= Path(filename).stat().st_mtime)
+    
+    if use_cached:
+        # Skip the ASCII parse entirely, the sidecar holds the raw float64 arrays
+        with np.load(cache_file) as cached:
+            nx, ny, nz = (int(n) for n in cached['dims'])
+            cached_coords = cached['coords']
+        n_points = nx * ny * nz
+        if verbose:
+            print(f"Loaded cached coordinates: {cache_file}")
+            print(f"Grid dimensions: {nx} x {ny} x {nz} = {n_points} points")
+        
+        if out is None:
+            coords = cached_coords
+        else:
+            coords = _coordinate_storage(n_points, out)
+            coords[...] = cached_coords
+    else:
+        # Map the file instead of reading it into memory, each line is sliced out on demand
+        with open(filename, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # Parse version/type (line 1)
+            version = int(mm.readline().strip())
+            if verbose:
+                print(f"File version/type: {version}")
+            
+            # Parse dimensions (line 2)
+            nx, ny, nz = (int(n) for n in _parse_line(mm.readline(), np.int64, 3, "dimensions"))
+            n_points = nx * ny * nz
+            if verbose:
+                print(f"Grid dimensions: {nx} x {ny} x {nz} = {n_points} points")
+            
+            # Parse coordinates (lines 3, 4, 5) into their row of the storage. The lines are
+            # independent and np.fromstring releases the GIL, so parse them in parallel
+            coords = _coordinate_storage(n_points, out)
+            lines = [mm.readline() for _ in range(3)]
+            
+            def parse_axis(axis):
+                name = 'xyz'[axis]
+                coords[axis] = _parse_line(lines[axis], np.float64, n_points, f"{name}-coordinates")
+            
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                list(executor.map(parse_axis, range(3)))
+    
+    # Coordinates are stored axis by axis, the points array is a transposed view of them
+    points = coords.T if out is None else out
+    
+    if cache and not use_cached:
+        np.savez(cache_file, dims=np.array([nx, ny, nz]), coords=coords)
+    
+    # The range report costs a min and a max pass over every axis, so only when asked for
+    if verbose:
+        print(f"Successfully parsed {n_points} control points")
+        for name, axis_coords in zip('XYZ', coords):
+            print(f"{name} range: [{axis_coords.min():.6f}, {axis_coords.max():.6f}]")
     
     return points, (nx, ny, nz)
 
@@ -82,7 +132,8 @@ def write_openfoam_format(points, output_file, box_name="boxcpsBsplines0"):
     """
     n_points = len(points)
     
-    with open(output_file, 'w') as f:
+    # Assemble the whole dictionary in memory and write it to disk in one go
+    with io.StringIO() as f:
         # Write FoamFile header
         f.write("/*--------------------------------*- C++ -*----------------------------------*\\\n")
         f.write("| =========                 |                                                 |\n")
@@ -105,23 +156,25 @@ def write_openfoam_format(points, output_file, box_name="boxcpsBsplines0"):
         # Write control points
         f.write(f"controlPoints   {n_points} ( ")
         
-        # Write points in a reasonably formatted way (not all on one line)
-        points_per_line = 1  # One point per line for better readability
-        for i, point in enumerate(points):
-            if i > 0 and i % points_per_line == 0:
-                f.write("\n")
-            f.write(f"( {point[0]:.8g} {point[1]:.8g} {point[2]:.8g} ) ")
+        # Write points one per line for better readability
+        rows = [POINT_FORMAT % tuple(point) for point in np.asarray(points).tolist()]
+        f.write(" \n".join(rows))
+        f.write(" ")
         
         f.write(");\n")
         f.write("\n")
         f.write("\n")
         f.write("// ************************************************************************* //\n")
+        
+        with open(output_file, 'w') as out:
+            out.write(f.getvalue())
     
     print(f"\nWrote OpenFOAM format file: {output_file}")
 
 
 def main():
-    if len(sys.argv) < 2:
+    args = sys.argv[1:]
+    if not args:
         print("Usage: python xyz_to_openfoam.py <xyz_file> [output_file] [box_name]")
         print("\nExamples:")
         print("  python xyz_to_openfoam.py teslaFFD.xyz")
@@ -129,23 +182,17 @@ def main():
         print("  python xyz_to_openfoam.py teslaFFD.xyz boxcpsBsplines0 myFFDBox")
         sys.exit(1)
     
-    input_file = sys.argv[1]
+    input_file = args[0]
     
-    # Determine output filename
-    if len(sys.argv) >= 3:
-        output_file = sys.argv[2]
-    else:
-        output_file = Path(input_file).stem  # Remove .xyz extension
+    # Determine output filename (default: input name without the .xyz extension)
+    output_file = args[1] if len(args) >= 2 else Path(input_file).stem
     
     # Determine box name
-    if len(sys.argv) >= 4:
-        box_name = sys.argv[3]
-    else:
-        box_name = Path(output_file).stem
+    box_name = args[2] if len(args) >= 3 else Path(output_file).stem
     
     # Parse the XYZ file
     print(f"Reading XYZ file: {input_file}")
-    points, dimensions = parse_xyz_file(input_file)
+    points, dimensions = parse_xyz_file(input_file, verbose=True)
     
     # Write OpenFOAM format
     write_openfoam_format(points, output_file, box_name)